@@ -7,93 +7,111 @@
 
 #!/bin/bash
 
-# Read parameters from param.json
-params=$(jq '.' param.json)
+# Check if jq is installed
+if ! command -v jq &> /dev/null
+then
+    echo "jq could not be found, please install it to run this script."
+    exit
+fi
+
+# Read parameters from param.json with a single jq call, one value per line
+params=$(jq -r '.masterFilePath,
+    .SourceFileFolderLocation,
+    .SourceFileDelimiter,
+    (.sourceFileColumnsList | tojson),
+    ((.columnsToRemoveFromSourceFileList // []) | join("\u001f")),
+    .OutputFileName,
+    .includeLineage' param.json) || {
+    echo "Failed to read param.json"
+    exit 1
+}
+{
+    IFS= read -r masterFilePath
+    IFS= read -r sourceFileFolder
+    IFS= read -r delimiter
+    IFS= read -r sourceColumns
+    IFS= read -r removeColumns
+    IFS= read -r outputFile
+    IFS= read -r includeLineage
+} <<< "$params"
 
-masterFilePath=$(jq -r '.masterFilePath' <<< "$params")
-sourceFileFolder=$(jq -r '.SourceFileFolderLocation' <<< "$params")
-delimiter=$(jq -r '.SourceFileDelimiter' <<< "$params")
-sourceColumns=$(jq -r '.sourceFileColumnsList' <<< "$params")
-removeColumns=$(jq -r '.columnsToRemoveFromSourceFileList' <<< "$params")
-outputFile=$(jq -r '.OutputFileName' <<< "$params")
-includeLineage=$(jq -r '.includeLineage' <<< "$params")
+# Lineage date, computed once so every file in a run shares the same value
+dateCreated=$(date "+%Y-%m-%d")
 
-# Function to remove columns
-remove_columns() {
-    local file=$1
-    local columnsToRemove=$2
-    local delimiter=$3
+# Function to remove columns and, optionally, add lineage columns in a single pass
+# All files are handled by one awk process; each file's own header picks its kept columns.
+# Pass printHeader=0 to drop the header rows. Lineage uses sourceFileName when given,
+# otherwise the base name of each file.
+merge_files() {
+    local columnsToRemove=$1
+    local delimiter=$2
+    local printHeader=$3
+    local sourceFileName=$4
+    shift 4
 
-    awk -v cols="$columnsToRemove" -v delim="$delimiter" 'BEGIN{FS=OFS=delim; split(cols, colsToRemoveArr)}
-    NR==1 {
+    awk -v cols="$columnsToRemove" -v delim="$delimiter" -v printHeader="$printHeader" \
+        -v lineage="$includeLineage" -v date="$dateCreated" -v sourceFile="$sourceFileName" 'BEGIN{
+        FS=OFS=delim
+        # Build the set of columns to remove once, for exact header matches
+        split(cols, colsToRemoveArr, "\037")
+        for (k in colsToRemoveArr) colsToRemove[colsToRemoveArr[k]]
+    }
+    FNR==1 {
+        # Record the positions of the kept columns once from the header
+        line=sep=""
+        n=0
         for (i=1; i<=NF; i++) {
-            if (index(cols, $i) == 0) {
-                printf "%s%s", sep, $i
+            if (!($i in colsToRemove)) {
+                line=line sep $i
                 sep=OFS
-                columnIndices[i]
+                keep[++n]=i
             }
         }
-        print ""
+        name=sourceFile
+        if (name == "") {
+            name=FILENAME
+            sub(/.*\//, "", name)
+        }
+        if (lineage == "true") line=line OFS "Date Created" OFS "Source File Name"
+        if (printHeader) print line
     }
-    NR>1 {
-        sep=""
-        for (i=1; i<=NF; i++) {
-            if (i in columnIndices) {
-                printf "%s%s", sep, $i
-                sep=OFS
-            }
+    FNR>1 {
+        line=sep=""
+        for (j=1; j<=n && keep[j]<=NF; j++) {
+            line=line sep $keep[j]
+            sep=OFS
         }
-        print ""
-    }' $file
+        if (lineage == "true") line=line OFS date OFS name
+        print line
+    }' "$@"
 }
 
+# Collect the source files, skipping the output file itself when it lives in the source folder
+sourceFiles=()
+for file in $sourceFileFolder/*.csv; do
+    if [ -f "$file" ] && [ ! "$file" -ef "$outputFile" ]; then
+        sourceFiles+=("$file")
+    fi
+done
 
-# Function to add lineage columns
-add_lineage() {
-    local file=$1
-    local sourceFileName=$2
-    local delimiter=$3
-    local dateCreated=$(date "+%Y-%m-%d")
-
-    awk -v date="$dateCreated" -v sourceFile="$sourceFileName" -v delim="$delimiter" 'BEGIN{FS=OFS=delim}
-    NR==1 {print $0, "Date Created", "Source File Name"}
-    NR>1 {print $0, date, sourceFile}' $file
-}
-
-# Check if jq is installed
-if ! command -v jq &> /dev/null
+# Write the master file after removing specified columns, then append the source rows
+# without headers. Everything goes to a temp file next to the output, which is moved into
+# place at the end so a failed run never leaves a partially written output file.
+tempOutput="$outputFile.tmp.$$"
+trap 'rm -f "$tempOutput"' EXIT
+if ! {
+    merge_files "$removeColumns" "$delimiter" 1 "master.csv" "$masterFilePath" &&
+    if [ ${#sourceFiles[@]} -gt 0 ]; then
+        merge_files "$removeColumns" "$delimiter" 0 "" "${sourceFiles[@]}"
+    fi
+} > "$tempOutput"
 then
-    echo "jq could not be found, please install it to run this script."
-    exit
+    echo "Data processing failed. Output file left unchanged: $outputFile"
+    exit 1
 fi
-
-# Overwrite output file with the master file after removing specified columns
-temp_master=$(mktemp)
-remove_columns "$masterFilePath" "$removeColumns" "$delimiter" > "$temp_master"
-if [ "$includeLineage" = "true" ]; then
-    add_lineage "$temp_master" "master.csv" "$delimiter" > "$outputFile"
-else
-    mv "$temp_master" "$outputFile"
+if ! mv "$tempOutput" "$outputFile"; then
+    echo "Data processing failed. Output file left unchanged: $outputFile"
+    exit 1
 fi
 
-
-
-# Process each source file
-for file in $sourceFileFolder/*.csv; do
-    if [ -f "$file" ]; then
-        temp_source=$(mktemp)
-        remove_columns "$file" "$removeColumns" "$delimiter" > "$temp_source"
-        if [ "$includeLineage" = "true" ]; then
-            sourceFileName=$(basename "$file")
-            temp_lineage=$(mktemp)
-            add_lineage "$temp_source" "$sourceFileName" "$delimiter" > "$temp_lineage"
-            tail -n +2 "$temp_lineage" >> "$outputFile" # Append without header
-            rm "$temp_lineage"
-        else
-            tail -n +2 "$temp_source" >> "$outputFile" # Append without header
-        fi
-        rm "$temp_source"
-    fi
-done
-
 echo "Data processing complete. Output file: $outputFile"
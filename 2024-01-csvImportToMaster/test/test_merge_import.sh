@@ -63,10 +63,60 @@ test_include_lineage() {
     run_test "Include lineage test" "[ $? -eq 0 ]" 0
 }
 
+# Test 4: Verify a missing columnsToRemoveFromSourceFileList keeps every column
+test_missing_remove_list() {
+    jq 'del(.columnsToRemoveFromSourceFileList)' param.json > param.tmp && mv param.tmp param.json
+    ../merge_import_csv.sh
+    grep -q "Jane,Doe" output.csv
+    run_test "Missing remove list test" "[ $? -eq 0 ]" 0
+}
+
+# Test 5: Verify columns are removed by exact name, not by substring
+test_remove_columns_exact_match() {
+    mkdir -p exact
+    echo "First Name,Name" > exact/master.csv
+    cat <<EOF > exact/param.json
+{
+  "masterFilePath": "$(pwd)/exact/master.csv",
+  "SourceFileFolderLocation": "$(pwd)/exact",
+  "SourceFileDelimiter": ",",
+  "columnsToRemoveFromSourceFileList": ["First Name"],
+  "OutputFileName": "$(pwd)/exact/output.csv",
+  "includeLineage": false
+}
+EOF
+    (cd exact && ../../merge_import_csv.sh)
+    [ "$(head -n 1 exact/output.csv)" = "Name" ]
+    run_test "Remove columns exact match test" "[ $? -eq 0 ]" 0
+}
+
+# Test 6: Verify a failed run keeps the previous output and exits with an error
+test_failure_keeps_output() {
+    mkdir -p failure
+    echo "previous output" > failure/output.csv
+    cat <<EOF > failure/param.json
+{
+  "masterFilePath": "$(pwd)/failure/missing.csv",
+  "SourceFileFolderLocation": "$(pwd)/failure",
+  "SourceFileDelimiter": ",",
+  "columnsToRemoveFromSourceFileList": [],
+  "OutputFileName": "$(pwd)/failure/output.csv",
+  "includeLineage": false
+}
+EOF
+    (cd failure && ../../merge_import_csv.sh)
+    status=$?
+    [ $status -ne 0 ] && [ "$(cat failure/output.csv)" = "previous output" ]
+    run_test "Failed run keeps output test" "[ $? -eq 0 ]" 0
+}
+
 # Run tests
 setup
 test_merge_files
 test_remove_columns
 test_include_lineage
+test_missing_remove_list
+test_remove_columns_exact_match
+test_failure_keeps_output
 
 echo "All tests passed successfully!"